@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .io import load_risk_scored_snapshot, save_risk_alerts, save_risk_scored_snapshot
+
+DEFAULT_THRESHOLDS: tuple[float, ...] = (0.90, 0.95, 0.99)
+
+ALERT_COLUMNS = [
+    "provider_id",
+    "as_of_date",
+    "prev_as_of_date",
+    "provider_risk_score",
+    "prev_risk_score",
+    "crossed_threshold",
+    "risk_rank",
+    "prev_risk_rank",
+    "rank_change",
+    "anomaly_total_flags",
+    "prev_anomaly_total_flags",
+    "reasons",
+]
+
+
+def _snapshot_arrays(snap: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Pull the columns alerts need out of a snapshot, sorted by provider_id."""
+    ids = snap["provider_id"].astype(str).to_numpy()
+    order = np.argsort(ids, kind="stable")
+    score = snap["provider_risk_score"].to_numpy(dtype="float64")
+    if "risk_rank" in snap.columns:
+        rank = snap["risk_rank"].to_numpy(dtype="float64")
+    else:
+        rank = snap["provider_risk_score"].rank(method="dense", ascending=False).to_numpy()
+    flags = snap["anomaly_total_flags"].to_numpy(dtype="float64")
+    return {"ids": ids[order], "score": score[order], "rank": rank[order], "flags": flags[order]}
+
+
+def build_risk_alerts(
+    current: pd.DataFrame,
+    previous: Optional[pd.DataFrame],
+    thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+    min_rank_rise: int = 50,
+    min_new_flags: int = 1,
+) -> pd.DataFrame:
+    """
+    Compare two provider snapshots and emit risk-change alerts.
+
+    Inputs
+    ------
+    current, previous:
+        Scored provider rows for the newest and the prior as_of_date (one row
+        per provider_id; needs provider_risk_score and anomaly_total_flags,
+        risk_rank is used when present). `previous` may be None on the first run.
+    thresholds:
+        provider_risk_score levels; an alert fires when a provider moves from
+        below a level to at/above it.
+    min_rank_rise:
+        Alert when risk_rank improves (moves towards 1) by at least this many places.
+    min_new_flags:
+        Alert when anomaly_total_flags grows by at least this much.
+
+    Both snapshots are sorted by provider_id once and aligned with a binary
+    search (sorted-key merge), so cost scales with one snapshot rather than
+    the whole panel history.
+    """
+    cur = _snapshot_arrays(current)
+    n = len(cur["ids"])
+    as_of = pd.to_datetime(current["as_of_date"]).max()
+
+    if previous is not None and len(previous):
+        prev = _snapshot_arrays(previous)
+        prev_as_of = pd.to_datetime(previous["as_of_date"]).max()
+        pos = np.searchsorted(prev["ids"], cur["ids"])
+        pos_c = np.clip(pos, 0, max(len(prev["ids"]) - 1, 0))
+        matched = (pos < len(prev["ids"])) & (prev["ids"][pos_c] == cur["ids"])
+        nan = np.full(n, np.nan)
+        prev_score = np.where(matched, prev["score"][pos_c], nan)
+        prev_rank = np.where(matched, prev["rank"][pos_c], nan)
+        prev_flags = np.where(matched, prev["flags"][pos_c], nan)
+    else:
+        prev_as_of = pd.NaT
+        matched = np.zeros(n, dtype=bool)
+        prev_score = prev_rank = prev_flags = np.full(n, np.nan)
+
+    # Highest threshold crossed upward (new providers count from 0)
+    base_score = np.where(matched, prev_score, 0.0)
+    crossed = np.full(n, np.nan)
+    for t in sorted(thresholds):
+        crossed = np.where((base_score < t) & (cur["score"] >= t), t, crossed)
+
+    rank_change = prev_rank - cur["rank"]  # positive = moved up the list
+    new_flags = cur["flags"] - np.where(matched, prev_flags, 0.0)
+
+    hit_threshold = ~np.isnan(crossed)
+    hit_rank = matched & (rank_change >= min_rank_rise)
+    hit_flags = new_flags >= min_new_flags
+    fire = hit_threshold | hit_rank | hit_flags
+
+    idx = np.flatnonzero(fire)
+    reasons = [
+        "; ".join(
+            r
+            for r in (
+                f"crossed {crossed[i]:.2f}" if hit_threshold[i] else "",
+                f"rank +{rank_change[i]:.0f}" if hit_rank[i] else "",
+                f"flags +{new_flags[i]:.0f}" if hit_flags[i] else "",
+                "new provider" if not matched[i] else "",
+            )
+            if r
+        )
+        for i in idx
+    ]
+
+    alerts = pd.DataFrame(
+        {
+            "provider_id": cur["ids"][idx],
+            "as_of_date": as_of,
+            "prev_as_of_date": prev_as_of,
+            "provider_risk_score": cur["score"][idx],
+            "prev_risk_score": prev_score[idx],
+            "crossed_threshold": crossed[idx],
+            "risk_rank": cur["rank"][idx],
+            "prev_risk_rank": prev_rank[idx],
+            "rank_change": rank_change[idx],
+            "anomaly_total_flags": cur["flags"][idx],
+            "prev_anomaly_total_flags": prev_flags[idx],
+            "reasons": reasons,
+        },
+        columns=ALERT_COLUMNS,
+    )
+    return alerts.sort_values("provider_risk_score", ascending=False, ignore_index=True)
+
+
+def run_risk_alert_stage(current: pd.DataFrame, **kwargs) -> pd.DataFrame:
+    """
+    Alert stage run after compute_risk_score, one snapshot at a time.
+
+    Inputs
+    ------
+    current:
+        Scored provider rows for a single as_of_date.
+    **kwargs:
+        Passed to `build_risk_alerts` (thresholds, min_rank_rise, min_new_flags).
+
+    Output
+    ------
+    The alert frame. `current` is saved with a per-snapshot risk_rank as
+    provider_panel_risk_scored_asof=<date>.parquet, and the alerts as
+    risk_alerts_asof=<date>.parquet. The previous snapshot is the newest
+    saved one before this date, so the panel history is never read and
+    re-running a date is idempotent.
+    """
+    as_of = pd.to_datetime(current["as_of_date"])
+    if as_of.nunique() != 1:
+        raise ValueError(f"Expected a single as_of_date, got {as_of.nunique()}")
+    as_of_date = as_of.iloc[0]
+
+    current = current.assign(
+        risk_rank=current["provider_risk_score"].rank(method="dense", ascending=False)
+    )
+    previous = load_risk_scored_snapshot(before=as_of_date)
+    alerts = build_risk_alerts(current, previous, **kwargs)
+
+    save_risk_scored_snapshot(current, as_of_date)
+    save_risk_alerts(alerts, as_of_date)
+    return alerts
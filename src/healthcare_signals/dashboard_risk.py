@@ -1,3 +1,9 @@
+import datetime as dt
+import os
+import sys
+import threading
+import time
+
 import pandas as pd
 import panel as pn
 import hvplot.pandas  # noqa: F401
@@ -10,17 +16,34 @@ from panel.template import FastListTemplate
 
 pn.extension('tabulator')
 
+# Running inside the browser (pyodide-worker build) rather than `panel serve`
+IN_BROWSER = sys.platform == "emscripten"
+
+TOP_N = 10
+
 # --- Load the risk-scored panel --------------------------------------------
-def load_panel():
-    candidate_paths = [
-        "../../data/processed/provider_panel_risk_scored.csv",
-        "../data/processed/provider_panel_risk_scored.csv",
-        "data/processed/provider_panel_risk_scored.csv",
-    ]
-    for path in candidate_paths:
+CANDIDATE_PATHS = [
+    "../../data/processed/provider_panel_risk_scored.csv",
+    "../data/processed/provider_panel_risk_scored.csv",
+    "data/processed/provider_panel_risk_scored.csv",
+]
+
+
+def _find_panel_path():
+    for path in CANDIDATE_PATHS:
+        if os.path.exists(path):
+            return os.path.abspath(path)
+    return None
+
+
+def load_panel(path=None):
+    if path is None:
+        path = _find_panel_path()
+
+    df = None
+    if path is not None:
         try:
             df = pd.read_csv(path)
-            break
         except Exception:
             df = None
 
@@ -49,15 +72,110 @@ def load_panel():
     return df
 
 
-provider_panel = load_panel()
+def build_shared_data(path=None):
+    """Load the panel and derive every table the sessions read from it."""
+    # Stat before reading: if the file is replaced mid-read, the stored mtime
+    # is the old one and the watcher reloads on its next pass
+    mtime = os.path.getmtime(path) if path else None
+    provider_panel = load_panel(path)
 
-# --- Global provider list (sorted by latest risk) --------------------------
-risk_by_provider = (
-    provider_panel.sort_values("as_of_date")
-    .groupby("provider_id")["provider_risk_score"]
-    .last()
-    .sort_values(ascending=False)
-)
+    # Global provider list (sorted by latest risk)
+    risk_by_provider = (
+        provider_panel.sort_values("as_of_date")
+        .groupby("provider_id")["provider_risk_score"]
+        .last()
+        .sort_values(ascending=False)
+    )
+
+    latest = (
+        provider_panel.sort_values("as_of_date")
+        .groupby("provider_id")
+        .tail(1)
+    )
+
+    top_risk_df = (
+        latest.sort_values("provider_risk_score", ascending=False)
+        .head(TOP_N)[
+            [
+                "provider_id",
+                "provider_risk_score",
+                "risk_rank",
+                "anomaly_total_flags",
+                "days_since_last",
+            ]
+        ]
+        .reset_index(drop=True)
+    )
+
+    # Add user-facing rank column (1..N) as first column
+    top_risk_df.insert(0, "Rank", range(1, len(top_risk_df) + 1))
+
+    return {
+        "path": path,
+        "mtime": mtime,
+        "provider_panel": provider_panel,
+        "risk_by_provider": risk_by_provider,
+        "latest": latest,
+        "top_risk_df": top_risk_df,
+    }
+
+
+# --- Process-wide cache for `panel serve` -----------------------------------
+# Every browser session re-executes this module. Under `panel serve` the
+# panel and its derived tables are built once per process, kept in
+# pn.state.cache and shared read-only by all sessions; a watcher thread
+# rebuilds them in the background when the CSV changes on disk. Sessions
+# opened after a refresh see the new data; open sessions keep their copy.
+_CACHE_KEY = "healthcare_signals.dashboard_risk.shared_data"
+REFRESH_INTERVAL_S = 30
+
+
+def _cache_lock():
+    # Module globals are re-created per session, so the lock lives in the cache too
+    return pn.state.cache.setdefault(_CACHE_KEY + ".lock", threading.Lock())
+
+
+def refresh_shared_data():
+    data = pn.state.cache.get(_CACHE_KEY)
+    path = _find_panel_path()
+    if data is None or path is None:
+        return
+    if path == data["path"] and os.path.getmtime(path) == data["mtime"]:
+        return
+
+    fresh = build_shared_data(path)
+    with _cache_lock():
+        pn.state.cache[_CACHE_KEY] = fresh
+
+
+def _watch_panel_file():
+    while True:
+        time.sleep(REFRESH_INTERVAL_S)
+        try:
+            refresh_shared_data()
+        except Exception:
+            # Half-written or unreadable file: keep serving the current data
+            continue
+
+
+def get_shared_data():
+    if IN_BROWSER:
+        return build_shared_data()
+
+    with _cache_lock():
+        data = pn.state.cache.get(_CACHE_KEY)
+        if data is None:
+            data = build_shared_data(_find_panel_path())
+            pn.state.cache[_CACHE_KEY] = data
+            threading.Thread(target=_watch_panel_file, name="provider-panel-watcher", daemon=True).start()
+    return data
+
+
+_shared = get_shared_data()
+provider_panel = _shared["provider_panel"]
+risk_by_provider = _shared["risk_by_provider"]
+_latest = _shared["latest"]
+top_risk_df = _shared["top_risk_df"]
 
 provider_ids_sorted = risk_by_provider.index.tolist()  # already strings
 provider_ids_sorted_str = provider_ids_sorted
@@ -278,40 +396,6 @@ def stability_view(pid):
 
 
 # --- Top Risk Providers table (left side) ----------------------------------
-TOP_N = 10
-
-_latest = (
-    provider_panel.sort_values("as_of_date")
-    .groupby("provider_id")
-    .tail(1)
-)
-
-top_risk_df = (
-    _latest.sort_values("provider_risk_score", ascending=False)
-    .head(TOP_N)[
-        [
-            "provider_id",
-            "provider_risk_score",
-            "risk_rank",
-            "anomaly_total_flags",
-            "days_since_last",
-        ]
-    ]
-    .reset_index(drop=True)
-)
-
-# Normalize provider_id
-top_risk_df["provider_id"] = (
-    top_risk_df["provider_id"]
-    .astype(str)
-    .str.replace(".0", "", regex=False)
-    .str.replace(",", "", regex=False)
-    .str.strip()
-)
-
-# Add user-facing rank column (1..N) as first column
-top_risk_df.insert(0, "Rank", range(1, len(top_risk_df) + 1))
-
 # Make all columns non-editable
 non_editable_editors = {col: None for col in top_risk_df.columns}
 
@@ -324,12 +408,8 @@ top_risk_table = pn.widgets.Tabulator(
     show_index=False,             # hides the 0-based index column
 )
 
-def _on_top_risk_click(event):
-    row_idx = event.row  # 0-based row position
-    if row_idx is None or not (0 <= row_idx < len(top_risk_df)):
-        return
-
-    pid = str(top_risk_df.iloc[row_idx]["provider_id"]).strip()
+def _select_provider(pid):
+    pid = str(pid).strip()
 
     provider_search.value = pid
     if pid in provider_dropdown.options:
@@ -341,9 +421,174 @@ def _on_top_risk_click(event):
         provider_dropdown.options = [pid]
         provider_dropdown.value = pid
 
+
+def _on_top_risk_click(event):
+    row_idx = event.row  # 0-based row position
+    if row_idx is None or not (0 <= row_idx < len(top_risk_df)):
+        return
+
+    _select_provider(top_risk_df.iloc[row_idx]["provider_id"])
+
 top_risk_table.on_click(_on_top_risk_click)
 
 
+# --- Cohort risk landscape (rasterized) -------------------------------------
+# All providers × snapshots are binned into a fixed-size count image in
+# Python (server process or pyodide worker) instead of being sent to the
+# browser as glyphs. RangeXY re-bins only the visible range on zoom/pan and
+# Tap lists the providers in the clicked cell.
+COHORT_BINS = (300, 150)  # (x, y)
+COHORT_MODES = {
+    "Risk vs 90d claims": "mean_daily_claims_90d",
+    "Risk over time": "as_of_date",
+}
+
+cohort_mode = pn.widgets.RadioButtonGroup(
+    name="Cohort view",
+    options=list(COHORT_MODES),
+    value="Risk vs 90d claims",
+)
+
+
+def _as_float_x(x_col, values):
+    if x_col == "as_of_date":
+        ns = pd.to_datetime(np.asarray(values)).to_numpy().astype("datetime64[ns]")
+        return ns.astype("int64").astype("float64")
+    return np.asarray(values, dtype="float64")
+
+
+def _cohort_xy(x_col):
+    x = _as_float_x(x_col, provider_panel[x_col].to_numpy())
+    y = provider_panel["provider_risk_score"].to_numpy(dtype="float64")
+    return x, y
+
+
+def _padded(lo, hi):
+    return (lo, hi) if hi > lo else (lo - 0.5, hi + 0.5)
+
+
+def _range_matches(x_col, x_range):
+    """True if `x_range` holds the kind of value `x_col` is plotted with (datetimes vs floats)."""
+    is_datetime = isinstance(x_range[0], (pd.Timestamp, np.datetime64, dt.datetime, dt.date))
+    return is_datetime == (x_col == "as_of_date")
+
+
+def _cohort_extent(x_col, x_range, y_range):
+    x, y = _cohort_xy(x_col)
+    if x_range is not None and not _range_matches(x_col, x_range):
+        # A zoom left over from the other mode's axis; start from the full extent
+        x_range = y_range = None
+    if x_range is None:
+        x_range = _padded(np.nanmin(x), np.nanmax(x))
+    else:
+        x_range = _padded(*_as_float_x(x_col, list(x_range)))
+    if y_range is None:
+        y_range = (0.0, 1.0)
+    y_range = _padded(float(y_range[0]), float(y_range[1]))
+    return x, y, x_range, y_range
+
+
+def rasterize_cohort(x_col, x_range=None, y_range=None):
+    x, y, x_range, y_range = _cohort_extent(x_col, x_range, y_range)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=COHORT_BINS, range=(x_range, y_range))
+
+    xs = (x_edges[:-1] + x_edges[1:]) / 2
+    ys = (y_edges[:-1] + y_edges[1:]) / 2
+    if x_col == "as_of_date":
+        xs = xs.astype("int64").astype("datetime64[ns]")
+
+    return hv.Image(
+        (xs, ys, np.log1p(counts.T)),
+        kdims=[x_col, "provider_risk_score"],
+        vdims=["log1p(count)"],
+    ).opts(
+        cmap="fire",
+        colorbar=True,
+        width=1000,
+        height=380,
+        tools=["tap", "hover"],
+        title="Cohort Risk Landscape (all providers × snapshots, log count)",
+    )
+
+
+def cohort_providers_in_cell(x_col, x, y, x_range=None, y_range=None):
+    """Providers (latest row in the cell) whose points fall in the tapped raster cell."""
+    px, py, x_range, y_range = _cohort_extent(x_col, x_range, y_range)
+    x_step = (x_range[1] - x_range[0]) / COHORT_BINS[0]
+    y_step = (y_range[1] - y_range[0]) / COHORT_BINS[1]
+    x0 = x_range[0] + np.floor((_as_float_x(x_col, [x])[0] - x_range[0]) / x_step) * x_step
+    y0 = y_range[0] + np.floor((float(y) - y_range[0]) / y_step) * y_step
+
+    mask = (px >= x0) & (px < x0 + x_step) & (py >= y0) & (py < y0 + y_step)
+    hits = provider_panel.loc[mask, ["provider_id", "as_of_date", "provider_risk_score", x_col]]
+    hits = hits.loc[:, ~hits.columns.duplicated()]
+    return (
+        hits.sort_values("as_of_date")
+        .groupby("provider_id")
+        .tail(1)
+        .sort_values("provider_risk_score", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def cohort_view(mode):
+    """
+    Fresh DynamicMap + RangeXY/Tap streams for one cohort mode.
+
+    Rebuilt on every mode switch so a zoom range from one x axis (floats vs
+    datetimes) is never replayed against the other.
+    """
+    x_col = COHORT_MODES[mode]
+    cohort_range = hv.streams.RangeXY()
+    cohort_tap = hv.streams.Tap(x=None, y=None)
+    dmap = hv.DynamicMap(
+        lambda x_range, y_range: rasterize_cohort(x_col, x_range, y_range),
+        streams=[cohort_range],
+    )
+    cohort_tap.source = dmap
+    cohort_tap.add_subscriber(lambda x, y: _on_cohort_tap(x_col, cohort_range, x, y))
+    return dmap
+
+
+cohort_drill_table = pn.widgets.Tabulator(
+    pd.DataFrame(columns=["provider_id", "as_of_date", "provider_risk_score"]),
+    height=220,
+    width=1000,
+    disabled=True,
+    show_index=False,
+)
+cohort_drill_note = pn.pane.Markdown("Click a cell in the landscape to list its providers.")
+
+
+def _on_cohort_tap(x_col, cohort_range, x, y):
+    if x is None or y is None:
+        return
+    hits = cohort_providers_in_cell(x_col, x, y, cohort_range.x_range, cohort_range.y_range)
+    cohort_drill_table.value = hits
+    cohort_drill_note.object = (
+        f"**{len(hits)} provider(s)** in the selected cell — click a row to open the provider."
+    )
+
+
+def _on_cohort_drill_click(event):
+    hits = cohort_drill_table.value
+    if event.row is None or not (0 <= event.row < len(hits)):
+        return
+    _select_provider(hits.iloc[event.row]["provider_id"])
+
+
+cohort_drill_table.on_click(_on_cohort_drill_click)
+
+
+cohort_section = pn.Column(
+    pn.pane.Markdown("## Cohort Risk Landscape"),
+    cohort_mode,
+    pn.bind(cohort_view, cohort_mode),
+    cohort_drill_note,
+    cohort_drill_table,
+)
+
+
 
 
 stability_section = pn.Accordion(
@@ -366,6 +611,7 @@ right_panel = pn.Column(
     pn.pane.Markdown("# Provider Risk Dashboard"),
     pn.Row(provider_search, provider_dropdown),
     pn.bind(provider_view, provider_dropdown),
+    cohort_section,
     margin=(10,10,80,10), # top, right, bottom, left
     
 )
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Per-snapshot metrics tracked by the drift stage (30d windows barely overlap
+# between monthly snapshots, so each update sees mostly new behavior)
+DEFAULT_DRIFT_METRICS: tuple[str, ...] = (
+    "mean_daily_claims_30d",
+    "mean_zscore_allowed_30d",
+)
+
+_STATE_FIELDS: tuple[str, ...] = ("ewma_mean", "ewma_var", "cusum_pos", "cusum_neg")
+
+
+def empty_drift_state(metrics: Sequence[str] = DEFAULT_DRIFT_METRICS) -> pd.DataFrame:
+    """Return an empty drift state frame (one row per provider_id once populated)."""
+    cols = {"n_obs": pd.Series(dtype="int64"), "last_as_of_date": pd.Series(dtype="datetime64[ns]")}
+    for m in metrics:
+        for field in _STATE_FIELDS:
+            cols[f"{m}__{field}"] = pd.Series(dtype="float64")
+    state = pd.DataFrame(cols)
+    state.index = pd.Index([], name="provider_id", dtype=object)
+    return state
+
+
+def update_drift_state(
+    state: Optional[pd.DataFrame],
+    snapshot: pd.DataFrame,
+    metrics: Sequence[str] = DEFAULT_DRIFT_METRICS,
+    alpha: float = 0.2,
+    cusum_k: float = 0.5,
+    cusum_h: float = 5.0,
+    warmup: int = 4,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fold one provider snapshot into the per-provider EWMA / CUSUM drift state.
+
+    Inputs
+    ------
+    state:
+        Drift state from the previous snapshot (see `empty_drift_state`), or None.
+    snapshot:
+        Provider panel rows for a single as_of_date (one row per provider_id).
+    metrics:
+        Snapshot columns to track.
+    alpha:
+        EWMA smoothing factor for the running mean / variance.
+    cusum_k, cusum_h:
+        CUSUM slack and decision threshold, in units of the EWMA std.
+    warmup:
+        Snapshots a provider needs before its z-scores count towards drift.
+
+    Output
+    ------
+    (new_state, scores) where scores has one row per provider in the snapshot:
+        - <metric>_drift_z:  deviation of this snapshot from the provider's EWMA
+        - <metric>_cusum:    max of the two-sided CUSUM statistics
+        - drift_score:       max CUSUM statistic across metrics
+        - drift_change_flag: 1 if any metric crossed `cusum_h` (CUSUM then resets)
+
+    Cost is O(providers in state + snapshot); nothing is recomputed from
+    earlier snapshots.
+    """
+    if state is None:
+        state = empty_drift_state(metrics)
+
+    as_of_ts = pd.to_datetime(snapshot["as_of_date"]).max().normalize()
+    if len(state) and state["last_as_of_date"].max() >= as_of_ts:
+        raise ValueError(
+            f"Drift state already includes {state['last_as_of_date'].max().date()}; "
+            f"snapshots must be applied in increasing as_of_date order (got {as_of_ts.date()})."
+        )
+
+    ids = pd.Index(snapshot["provider_id"], name="provider_id")
+    prev = state.reindex(ids)
+    n_prev = prev["n_obs"].fillna(0).to_numpy(dtype="int64")
+    seen = n_prev > 0
+    warm = n_prev >= warmup
+
+    new = pd.DataFrame(index=ids)
+    new["n_obs"] = n_prev + 1
+    new["last_as_of_date"] = as_of_ts
+
+    scores = pd.DataFrame({"provider_id": ids, "as_of_date": as_of_ts})
+    change = np.zeros(len(ids), dtype=bool)
+    drift_score = np.zeros(len(ids))
+
+    for m in metrics:
+        x = snapshot[m].to_numpy(dtype="float64")
+        mean = prev[f"{m}__ewma_mean"].to_numpy()
+        var = prev[f"{m}__ewma_var"].to_numpy()
+        s_pos = prev[f"{m}__cusum_pos"].fillna(0.0).to_numpy()
+        s_neg = prev[f"{m}__cusum_neg"].fillna(0.0).to_numpy()
+
+        # First sighting seeds the EWMA with the observed value
+        mean = np.where(seen, mean, x)
+        var = np.where(seen, var, 0.0)
+
+        # EWMA variance is seeded at 0, so debias it by the weight it has
+        # accumulated (1 - (1 - alpha)^(n - 1)) before standardizing
+        debias = 1.0 - (1.0 - alpha) ** np.maximum(n_prev - 1, 1)
+        z = np.where(warm, (x - mean) / np.sqrt(var / debias + 1e-9), 0.0)
+        z = np.nan_to_num(z)
+
+        s_pos = np.maximum(0.0, s_pos + z - cusum_k)
+        s_neg = np.maximum(0.0, s_neg - z - cusum_k)
+        s_max = np.maximum(s_pos, s_neg)
+        crossed = s_max > cusum_h
+
+        diff = x - mean
+        new[f"{m}__ewma_mean"] = mean + alpha * diff
+        new[f"{m}__ewma_var"] = (1 - alpha) * (var + alpha * diff**2)
+        new[f"{m}__cusum_pos"] = np.where(crossed, 0.0, s_pos)
+        new[f"{m}__cusum_neg"] = np.where(crossed, 0.0, s_neg)
+
+        scores[f"{m}_drift_z"] = z
+        scores[f"{m}_cusum"] = s_max
+        change |= crossed
+        drift_score = np.maximum(drift_score, s_max)
+
+    scores["drift_score"] = drift_score
+    scores["drift_change_flag"] = change.astype(int)
+
+    # Providers absent from this snapshot keep their state untouched
+    new_state = pd.concat([state.drop(index=ids, errors="ignore"), new])
+    new_state.index.name = "provider_id"
+    return new_state, scores
+
+
+def drift_score_columns(metrics: Sequence[str] = DEFAULT_DRIFT_METRICS) -> list[str]:
+    """Columns `update_drift_state` emits per snapshot (besides provider_id / as_of_date)."""
+    cols = [c for m in metrics for c in (f"{m}_drift_z", f"{m}_cusum")]
+    return cols + ["drift_score", "drift_change_flag"]
+
+
+def run_drift_over_panel(
+    panel: pd.DataFrame,
+    state: Optional[pd.DataFrame] = None,
+    metrics: Sequence[str] = DEFAULT_DRIFT_METRICS,
+    scores: Optional[pd.DataFrame] = None,
+    **kwargs,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Stream a multi-snapshot panel through `update_drift_state`, oldest first.
+
+    Snapshots already folded into `state` are skipped, so a persisted state
+    can be resumed with the full panel and only new snapshots are processed.
+    Their drift columns are taken from `scores`, the drift columns emitted by
+    earlier runs (see io.save_drift_scores / load_drift_scores); resuming
+    over already-folded snapshots without `scores` raises ValueError.
+    Returns (panel with drift columns merged on for every snapshot, final state).
+    """
+    if state is None:
+        state = empty_drift_state(metrics)
+
+    key = ["provider_id", "as_of_date"]
+    drift_cols = drift_score_columns(metrics)
+    dates = pd.to_datetime(panel["as_of_date"]).dt.normalize()
+    last = state["last_as_of_date"].max() if len(state) else pd.NaT
+
+    folded = dates <= last if pd.notna(last) else pd.Series(False, index=panel.index)
+
+    all_scores = []
+    if folded.any():
+        if scores is None:
+            raise ValueError(
+                f"Drift state already covers snapshots up to {last.date()}; pass the saved "
+                "drift scores (io.load_drift_scores) so those rows keep their drift columns."
+            )
+        saved = scores.assign(as_of_date=pd.to_datetime(scores["as_of_date"]).dt.normalize())
+        saved = saved[saved["as_of_date"] <= last].drop_duplicates(key, keep="last")
+        all_scores.append(saved[key + drift_cols])
+
+    for _, snap in panel[~folded].groupby(dates[~folded], sort=True):
+        state, new_scores = update_drift_state(state, snap, metrics=metrics, **kwargs)
+        all_scores.append(new_scores)
+
+    out = panel.drop(columns=[c for c in drift_cols if c in panel.columns]).assign(as_of_date=dates)
+    if all_scores:
+        out = out.merge(pd.concat(all_scores, ignore_index=True), on=key, how="left")
+    else:
+        out = out.reindex(columns=[*out.columns, *drift_cols])
+    return out, state
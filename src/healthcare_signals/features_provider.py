@@ -18,6 +18,23 @@ def _window_slice(df: pd.DataFrame, as_of_ts: pd.Timestamp, days: int) -> pd.Dat
     return df.loc[mask]
 
 
+def assign_provider_states(facts_daily: pd.DataFrame) -> pd.Series:
+    """
+    Pick one state per provider: the state with the most claims in
+    `facts_daily` (ties go to the alphabetically first state).
+
+    Providers can bill in several states; every stage that needs a single
+    state (the panel's `state` column, state sharding) uses this rule so a
+    provider never lands in two shards.
+    """
+    by_state = (
+        facts_daily.groupby(["provider_id", "state"], as_index=False, observed=True)["claims_cnt"]
+        .sum()
+        .sort_values(["provider_id", "claims_cnt", "state"], ascending=[True, False, True], kind="stable")
+    )
+    return by_state.drop_duplicates("provider_id").set_index("provider_id")["state"]
+
+
 def _summarize_window(df_win: pd.DataFrame) -> pd.Series:
     """Aggregate per-provider behavior in a given window."""
     if df_win.empty:
@@ -50,6 +67,7 @@ def build_provider_panel_for_date(
     as_of_date: str | pd.Timestamp,
     facts_daily: Optional[pd.DataFrame] = None,
     windows: Sequence[int] = DEFAULT_WINDOWS,
+    provider_states: Optional[pd.Series] = None,
 ) -> pd.DataFrame:
     """
     Build provider-level signals for a single snapshot date.
@@ -63,6 +81,9 @@ def build_provider_panel_for_date(
         If None, will be loaded via `load_facts_daily()`.
     windows:
         Rolling windows (in days) to compute behavior over (e.g. [30, 90, 365]).
+    provider_states:
+        provider_id → state mapping for the `state` column. Defaults to
+        `assign_provider_states(facts_daily)` when facts carry a state.
 
     Output
     ------
@@ -97,16 +118,20 @@ def build_provider_panel_for_date(
         )
 
     # Lifetime-level aggregates
-    base = (
-        df_hist.groupby("provider_id", as_index=False)
-        .agg(
-            first_activity_dt=("date", "min"),
-            last_activity_dt=("date", "max"),
-            total_claims_lifetime=("claims_cnt", "sum"),
-            n_active_days_lifetime=("date", "nunique"),
-            mean_zscore_lifetime=("zscore_allowed_amt", "mean"),
-        )
+    lifetime_aggs = dict(
+        first_activity_dt=("date", "min"),
+        last_activity_dt=("date", "max"),
+        total_claims_lifetime=("claims_cnt", "sum"),
+        n_active_days_lifetime=("date", "nunique"),
+        mean_zscore_lifetime=("zscore_allowed_amt", "mean"),
     )
+    base = df_hist.groupby("provider_id", as_index=False).agg(**lifetime_aggs)
+
+    if provider_states is None and "state" in df.columns:
+        provider_states = assign_provider_states(df)
+    if provider_states is not None:
+        # Keep the provider's state so downstream stages can score against state peers
+        base["state"] = base["provider_id"].map(provider_states)
     base["days_since_last"] = (as_of_ts - base["last_activity_dt"]).dt.days
 
     panel = base.copy()
@@ -161,14 +186,20 @@ def build_provider_panel_over_range(
     """
     Build a concatenated provider panel for multiple snapshot dates.
 
-    Each snapshot uses only history up to that as_of_date.
+    Each snapshot uses only history up to that as_of_date; the `state`
+    column is assigned once from the full facts (see `assign_provider_states`).
     """
     if facts_daily is None:
         facts_daily = load_facts_daily()
 
+    # Assign states once over the full facts so every snapshot agrees
+    provider_states = assign_provider_states(facts_daily) if "state" in facts_daily.columns else None
+
     panels = []
     for d in snapshot_dates:
-        p = build_provider_panel_for_date(d, facts_daily=facts_daily, windows=windows)
+        p = build_provider_panel_for_date(
+            d, facts_daily=facts_daily, windows=windows, provider_states=provider_states
+        )
         if not p.empty:
             panels.append(p)
 
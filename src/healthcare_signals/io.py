@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+import json
 from pathlib import Path
 from typing import Iterable, Sequence
 
 import pandas as pd
 
+from .qc import validate_facts_daily
+from .quantile_sketch import KLLSketch
+
 # Project root: repo_root / src / healthcare_signals / io.py → go 2 levels up
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
 
 
-def load_facts_daily() -> pd.DataFrame:
+def load_facts_daily(*, validate: bool = True) -> pd.DataFrame:
     """
     Load daily provider facts from:
         data/raw/facts_daily.csv
@@ -23,6 +27,10 @@ def load_facts_daily() -> pd.DataFrame:
         - claims_cnt
         - avg_allowed_amt
         - zscore_allowed_amt
+
+    Runs `qc.validate_facts_daily` on the loaded frame and raises ValueError
+    if any error-level check fails (e.g. duplicate (provider_id, date) rows
+    that would inflate total_claims). Pass validate=False to skip the gate.
     """
     path = DATA_RAW / "facts_daily.parquet"
     if not path.exists():
@@ -31,6 +39,9 @@ def load_facts_daily() -> pd.DataFrame:
     df = pd.read_parquet(path)
     df = df.copy()
     df["date"] = pd.to_datetime(df["date"])
+
+    if validate:
+        validate_facts_daily(df).raise_for_errors()
     return df
 
 
@@ -70,3 +81,146 @@ def save_provider_panel_full(panel: pd.DataFrame, name: str = "provider_panel_al
     out_path = DATA_PROCESSED / name
     panel.to_parquet(out_path, index=False)
     return out_path
+
+
+def save_drift_state(state: pd.DataFrame, name: str = "drift_state.parquet") -> Path:
+    """
+    Persist the per-provider drift state (EWMA / CUSUM) to:
+
+        data/processed/<name>
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    out_path = DATA_PROCESSED / name
+    state.to_parquet(out_path, index=True)
+    return out_path
+
+
+def load_drift_state(name: str = "drift_state.parquet") -> pd.DataFrame | None:
+    """
+    Load the persisted drift state, or None if no run has saved one yet.
+    """
+    path = DATA_PROCESSED / name
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def save_drift_scores(panel: pd.DataFrame, name: str = "drift_scores.parquet") -> Path:
+    """
+    Persist the per-snapshot drift columns emitted by `drift.run_drift_over_panel`
+    (keyed by provider_id, as_of_date) next to the drift state, to:
+
+        data/processed/<name>
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    out_path = DATA_PROCESSED / name
+    drift_cols = [
+        c for c in panel.columns
+        if c.endswith(("_drift_z", "_cusum")) or c in ("drift_score", "drift_change_flag")
+    ]
+    cols = ["provider_id", "as_of_date", *drift_cols]
+    panel[cols].to_parquet(out_path, index=False)
+    return out_path
+
+
+def load_drift_scores(name: str = "drift_scores.parquet") -> pd.DataFrame | None:
+    """
+    Load the persisted drift scores, or None if no run has saved them yet.
+    """
+    path = DATA_PROCESSED / name
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def save_state_shard(panel: pd.DataFrame, state: str) -> Path:
+    """
+    Save a single state's provider panel shard to:
+
+        data/processed/provider_panel_state=<STATE>.parquet
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    out_path = DATA_PROCESSED / f"provider_panel_state={state}.parquet"
+    panel.to_parquet(out_path, index=False)
+    return out_path
+
+
+def load_state_shards(states: Iterable[str] | None = None) -> dict[str, pd.DataFrame]:
+    """
+    Load saved state shards (all of them when `states` is None), keyed by state.
+    """
+    if states is None:
+        paths = sorted(DATA_PROCESSED.glob("provider_panel_state=*.parquet"))
+    else:
+        paths = [DATA_PROCESSED / f"provider_panel_state={s}.parquet" for s in states]
+
+    return {
+        path.stem.split("=", 1)[1]: pd.read_parquet(path)
+        for path in paths
+    }
+
+
+def save_risk_sketch(sketch: KLLSketch, name: str = "provider_risk_sketch.json") -> Path:
+    """
+    Persist a risk quantile sketch to:
+
+        data/processed/<name>
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    out_path = DATA_PROCESSED / name
+    out_path.write_text(json.dumps(sketch.to_dict()))
+    return out_path
+
+
+def load_risk_sketch(name: str = "provider_risk_sketch.json") -> KLLSketch | None:
+    """
+    Load the persisted risk quantile sketch, or None if none has been saved.
+    """
+    path = DATA_PROCESSED / name
+    if not path.exists():
+        return None
+    return KLLSketch.from_dict(json.loads(path.read_text()))
+
+
+def save_risk_scored_snapshot(panel: pd.DataFrame, as_of_date: str | pd.Timestamp) -> Path:
+    """
+    Save one scored provider snapshot (output of compute_risk_score) to:
+
+        data/processed/provider_panel_risk_scored_asof=<YYYY-MM-DD>.parquet
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    ts = pd.to_datetime(as_of_date).date()
+    out_path = DATA_PROCESSED / f"provider_panel_risk_scored_asof={ts}.parquet"
+    panel.to_parquet(out_path, index=False)
+    return out_path
+
+
+def load_risk_scored_snapshot(before: str | pd.Timestamp | None = None) -> pd.DataFrame | None:
+    """
+    Load the newest saved scored snapshot, or the newest one strictly before
+    `before`. Dates are read from the file names, so only that one file is
+    parsed. Returns None if there is none.
+    """
+    dated = {
+        pd.Timestamp(path.stem.split("=", 1)[1]): path
+        for path in DATA_PROCESSED.glob("provider_panel_risk_scored_asof=*.parquet")
+    }
+    if before is not None:
+        cutoff = pd.to_datetime(before).normalize()
+        dated = {d: p for d, p in dated.items() if d < cutoff}
+    if not dated:
+        return None
+    return pd.read_parquet(dated[max(dated)])
+
+
+def save_risk_alerts(alerts: pd.DataFrame, as_of_date: str | pd.Timestamp) -> Path:
+    """
+    Save the risk-change alert feed for one snapshot to:
+
+        data/processed/risk_alerts_asof=<YYYY-MM-DD>.parquet
+    """
+    DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+    ts = pd.to_datetime(as_of_date).date()
+    out_path = DATA_PROCESSED / f"risk_alerts_asof={ts}.parquet"
+    alerts.to_parquet(out_path, index=False)
+    return out_path
@@ -1,38 +1,338 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
-from sklearn.neighbors import LocalOutlierFactor
+from sklearn.neighbors import LocalOutlierFactor, NearestNeighbors
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Contiguous float32 view of the anomaly features.
+
+    Built once per panel and handed to every detector, so IsolationForest,
+    LOF and the z-score flags all read the same buffer instead of each
+    slicing `df[feature_cols]` into its own float64 copy.
+    """
+
+    values: np.ndarray
+    columns: list[str]
+    index: pd.Index
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, feature_cols: Sequence[str], dtype=np.float32) -> "FeatureMatrix":
+        cols = list(dict.fromkeys(feature_cols))
+        values = np.ascontiguousarray(df[cols].to_numpy(dtype=dtype))
+        return cls(values=values, columns=cols, index=df.index)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a single feature column (a strided view, no copy)."""
+        return self.values[:, self.columns.index(name)]
+
 
-def run_isolation_forest(df, feature_cols, contamination=0.02, random_state=42):
+def _as_matrix(df, feature_cols, features=None) -> FeatureMatrix:
+    """Reuse a prebuilt FeatureMatrix (it must hold exactly `feature_cols`) or build one from `df`."""
+    if features is None:
+        return FeatureMatrix.from_frame(df, feature_cols)
+    if features.columns != list(dict.fromkeys(feature_cols)):
+        raise ValueError(f"FeatureMatrix holds {features.columns}, expected {list(feature_cols)}")
+    return features
+
+
+def _attach(df, outputs, index):
+    """Write all detector outputs onto `df` in place (as the helpers always have) and return it."""
+    block = pd.DataFrame(outputs, index=index)
+    df[list(block.columns)] = block
+    return df
+
+
+def _isolation_forest_outputs(X, contamination=0.02, random_state=42, n_jobs=None):
     model = IsolationForest(
         contamination=contamination,
         n_estimators=400,
         max_samples='auto',
-        random_state=random_state
+        random_state=random_state,
+        n_jobs=n_jobs
     )
-    scores = model.fit_predict(df[feature_cols])
-    df['iforest_score'] = model.decision_function(df[feature_cols])
-    df['iforest_flag'] = (scores == -1).astype(int)
-    return df
+    scores = model.fit_predict(X)
+    return {
+        'iforest_score': model.decision_function(X),
+        'iforest_flag': (scores == -1).astype(int),
+    }
+
 
-def run_lof(df, feature_cols, n_neighbors=20, contamination=0.02):
+def _lof_outputs(X, n_neighbors=20, contamination=0.02, n_jobs=None):
     lof = LocalOutlierFactor(
         n_neighbors=n_neighbors,
-        contamination=contamination
+        contamination=contamination,
+        n_jobs=n_jobs
     )
-    labels = lof.fit_predict(df[feature_cols])
-    df['lof_score'] = lof.negative_outlier_factor_
-    df['lof_flag'] = (labels == -1).astype(int)
-    return df
+    labels = lof.fit_predict(X)
+    return {
+        'lof_score': lof.negative_outlier_factor_,
+        'lof_flag': (labels == -1).astype(int),
+    }
 
-def add_zscore_flags(df, cols, threshold=3.0):
+
+def _zscore_outputs(fm, df, cols, threshold=3.0):
+    outputs = {}
     for col in cols:
-        z = (df[col] - df[col].mean()) / df[col].std(ddof=0)
-        df[f'{col}_z'] = z
-        df[f'{col}_z_flag'] = (z.abs() > threshold).astype(int)
-    return df
+        x = fm.column(col) if col in fm.columns else df[col].to_numpy(dtype=np.float32)
+        # Accumulate in float64 so the float32 storage doesn't cost precision
+        z = (x - np.nanmean(x, dtype=np.float64)) / np.nanstd(x, dtype=np.float64)
+        outputs[f'{col}_z'] = z
+        outputs[f'{col}_z_flag'] = (np.abs(z) > threshold).astype(int)
+    return outputs
 
-def combine_flags(df):
-    flag_cols = [c for c in df.columns if c.endswith("_flag")]
-    df['anomaly_total_flags'] = df[flag_cols].sum(axis=1)
-    df['anomaly_rank'] = df['anomaly_total_flags'].rank(method='dense', ascending=False)
-    return df
+
+def run_isolation_forest(df, feature_cols, contamination=0.02, random_state=42, n_jobs=None, features=None):
+    fm = _as_matrix(df, feature_cols, features)
+    outputs = _isolation_forest_outputs(fm.values, contamination, random_state, n_jobs)
+    return _attach(df, outputs, fm.index)
+
+def run_lof(df, feature_cols, n_neighbors=20, contamination=0.02, n_jobs=None, features=None):
+    fm = _as_matrix(df, feature_cols, features)
+    outputs = _lof_outputs(fm.values, n_neighbors, contamination, n_jobs)
+    return _attach(df, outputs, fm.index)
+
+def add_zscore_flags(df, cols, threshold=3.0, features=None):
+    # z-score columns may sit outside `features`; those are read from df
+    fm = features if features is not None else FeatureMatrix.from_frame(df, cols)
+    outputs = _zscore_outputs(fm, df, cols, threshold)
+    return _attach(df, outputs, fm.index)
+
+def combine_flags(df, flag_cols=None):
+    if flag_cols is None:
+        flag_cols = [c for c in df.columns if c.endswith("_flag")]
+    total = df[flag_cols].sum(axis=1)
+    outputs = {
+        'anomaly_total_flags': total,
+        'anomaly_rank': total.rank(method='dense', ascending=False),
+    }
+    return _attach(df, outputs, df.index)
+
+
+def _core_budget(n_jobs):
+    """Resolve a joblib-style n_jobs (None / -1 / negative / positive) to a core count."""
+    cpus = os.cpu_count() or 1
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return n_jobs
+
+
+def run_anomaly_ensemble(
+    df,
+    feature_cols,
+    zscore_cols=(),
+    contamination=0.02,
+    n_neighbors=20,
+    zscore_threshold=3.0,
+    random_state=42,
+    n_jobs=-1,
+    iforest_n_jobs=None,
+    lof_n_jobs=None,
+    features=None,
+):
+    """
+    Run IsolationForest, LOF and z-score flags concurrently off one FeatureMatrix.
+
+    The three detectors are submitted to a thread pool (sklearn releases the
+    GIL in tree building and neighbor search, and threads share the matrix
+    without pickling it), and `n_jobs` is passed through so each detector
+    also parallelizes internally. The `n_jobs` core budget is split between
+    IsolationForest and LOF (they run at the same time), so the ensemble
+    doesn't oversubscribe the machine; wall time approaches the slowest
+    detector rather than the sum. `iforest_n_jobs` / `lof_n_jobs` override
+    the split per detector.
+
+    Results are deterministic under a fixed `random_state`: IsolationForest
+    draws its per-tree seeds up front, LOF has no randomness, and outputs are
+    assembled in a fixed order regardless of completion order. With a budget
+    of one core (`n_jobs=1`, or a single-CPU machine) everything runs
+    sequentially on the calling thread.
+
+    Pass a prebuilt FeatureMatrix over `feature_cols` as `features` to reuse
+    it. Like the single-detector helpers, outputs are written onto `df` in
+    place and `df` is returned.
+    """
+    fm = _as_matrix(df, feature_cols, features)
+    X = fm.values
+
+    budget = _core_budget(n_jobs)
+    if iforest_n_jobs is None:
+        iforest_n_jobs = max(1, budget // 2)
+    if lof_n_jobs is None:
+        lof_n_jobs = max(1, budget - budget // 2)
+
+    tasks = [
+        (_isolation_forest_outputs, (X, contamination, random_state, iforest_n_jobs)),
+        (_lof_outputs, (X, n_neighbors, contamination, lof_n_jobs)),
+        (_zscore_outputs, (fm, df, zscore_cols, zscore_threshold)),
+    ]
+    if budget == 1:
+        results = [fn(*args) for fn, args in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            futures = [pool.submit(fn, *args) for fn, args in tasks]
+            results = [f.result() for f in futures]
+
+    outputs = {}
+    for result in results:
+        outputs.update(result)
+
+    flag_cols = [c for c in outputs if c.endswith("_flag")]
+    total = np.sum([outputs[c] for c in flag_cols], axis=0)
+    outputs['anomaly_total_flags'] = total
+    outputs['anomaly_rank'] = pd.Series(total, index=fm.index).rank(method='dense', ascending=False)
+
+    return _attach(df, outputs, fm.index)
+
+
+def score_anomalies(
+    df,
+    feature_cols,
+    zscore_cols=(),
+    contamination=0.02,
+    n_neighbors=20,
+    zscore_threshold=3.0,
+    random_state=42,
+    features=None,
+):
+    """
+    Run IsolationForest, LOF and z-score flags off a single FeatureMatrix.
+
+    Sequential form of `run_anomaly_ensemble`: the matrix is built once from
+    `feature_cols`, every detector reads it without copying (z-score columns
+    outside the matrix are read from `df`), and all outputs — including
+    `anomaly_total_flags` / `anomaly_rank` — are written back onto `df`
+    in place.
+    """
+    return run_anomaly_ensemble(
+        df,
+        feature_cols,
+        zscore_cols,
+        contamination=contamination,
+        n_neighbors=n_neighbors,
+        zscore_threshold=zscore_threshold,
+        random_state=random_state,
+        n_jobs=1,
+        features=features,
+    )
+
+
+def lof_from_knn(distances, indices, n_neighbors):
+    """
+    LOF negative_outlier_factor_ from a precomputed kNN graph.
+
+    `distances` / `indices` are the training-set neighbors (self excluded,
+    sorted by distance) for any k >= n_neighbors; the first `n_neighbors`
+    columns give the same result as fitting LocalOutlierFactor at that k.
+    """
+    dist_k = distances[:, :n_neighbors]
+    ind_k = indices[:, :n_neighbors]
+    reach_dist = np.maximum(dist_k, dist_k[:, -1][ind_k])
+    lrd = 1.0 / (reach_dist.mean(axis=1) + 1e-10)
+    return -(lrd[ind_k] / lrd[:, np.newaxis]).mean(axis=1)
+
+
+def _flags_at(scores, contamination):
+    """Flag the `contamination` share with the lowest scores (sklearn's offset_ rule)."""
+    return scores < np.percentile(scores, 100.0 * contamination)
+
+
+def _spearman(a, b):
+    return float(np.corrcoef(pd.Series(a).rank().to_numpy(), pd.Series(b).rank().to_numpy())[0, 1])
+
+
+def _jaccard(a, b):
+    union = np.count_nonzero(a | b)
+    return float(np.count_nonzero(a & b) / union) if union else 1.0
+
+
+@dataclass
+class AnomalySweep:
+    """
+    Cached detector scores from `sweep_anomaly_params`.
+
+    report has one row per (detector, n_neighbors, contamination) with the
+    flag count and rank stability against the reference setting.
+    """
+
+    report: pd.DataFrame
+    iforest_scores: np.ndarray
+    lof_scores: dict[int, np.ndarray]
+    index: pd.Index
+
+    def flags(self, detector, contamination, n_neighbors=None) -> pd.Series:
+        scores = self.iforest_scores if detector == 'iforest' else self.lof_scores[n_neighbors]
+        return pd.Series(_flags_at(scores, contamination).astype(int), index=self.index)
+
+
+def sweep_anomaly_params(
+    df,
+    feature_cols,
+    n_neighbors_grid=(10, 20, 35, 50),
+    contamination_grid=(0.01, 0.02, 0.05),
+    reference=(20, 0.02),
+    random_state=42,
+    n_jobs=None,
+    features=None,
+):
+    """
+    Sweep LOF n_neighbors and LOF / IsolationForest contamination in one pass.
+
+    The kNN graph is computed once at the largest k and LOF scores for every
+    smaller k are derived from its leading columns; IsolationForest is fitted
+    once. Contamination only moves the decision threshold, so each setting is
+    a percentile cut over the cached scores rather than a refit.
+
+    Stability columns compare each setting with `reference` (n_neighbors,
+    contamination) — the run_lof / run_isolation_forest defaults:
+        - rank_corr:    Spearman correlation of scores with the reference k
+        - flag_jaccard: overlap of the flagged set with the reference flags
+    """
+    fm = _as_matrix(df, feature_cols, features)
+    X = fm.values
+    ref_k, ref_c = reference
+
+    ks = sorted({min(k, len(X) - 1) for k in (*n_neighbors_grid, ref_k)})
+    ref_k = min(ref_k, len(X) - 1)
+    nn = NearestNeighbors(n_neighbors=ks[-1], n_jobs=n_jobs).fit(X)
+    distances, indices = nn.kneighbors()
+    lof_scores = {k: lof_from_knn(distances, indices, k) for k in ks}
+
+    iforest = IsolationForest(
+        n_estimators=400,
+        max_samples='auto',
+        random_state=random_state,
+        n_jobs=n_jobs
+    ).fit(X)
+    iforest_scores = iforest.score_samples(X)
+
+    rows = []
+    ref_flags = _flags_at(iforest_scores, ref_c)
+    for c in contamination_grid:
+        flags = _flags_at(iforest_scores, c)
+        rows.append(('iforest', np.nan, c, int(flags.sum()), 1.0, _jaccard(flags, ref_flags)))
+
+    ref_scores = lof_scores[ref_k]
+    ref_flags = _flags_at(ref_scores, ref_c)
+    for k in ks:
+        rank_corr = _spearman(lof_scores[k], ref_scores)
+        for c in contamination_grid:
+            flags = _flags_at(lof_scores[k], c)
+            rows.append(('lof', k, c, int(flags.sum()), rank_corr, _jaccard(flags, ref_flags)))
+
+    report = pd.DataFrame(
+        rows,
+        columns=['detector', 'n_neighbors', 'contamination', 'n_flagged', 'rank_corr', 'flag_jaccard'],
+    )
+    return AnomalySweep(report=report, iforest_scores=iforest_scores, lof_scores=lof_scores, index=fm.index)
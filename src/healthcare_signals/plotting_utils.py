@@ -8,3 +8,38 @@ def plot_provider_trend(df, value_col):
     plt.ylabel(value_col)
     plt.grid(True)
     plt.show()
+
+
+def save_provider_report_chart(df, value_col, out_path, risk_col="provider_risk_score"):
+    """
+    Render a provider's trend (and risk score, when present) straight to a PNG.
+
+    Uses a bare matplotlib Figure rather than pyplot, so nothing is shown and
+    it is safe to call from worker processes with the Agg backend.
+    """
+    from matplotlib.figure import Figure
+
+    has_risk = risk_col in df.columns
+    fig = Figure(figsize=(12, 6 if has_risk else 4))
+    axes = fig.subplots(2 if has_risk else 1, 1, sharex=True, squeeze=False)[:, 0]
+
+    ax = axes[0]
+    ax.plot(df['snapshot_dt'], df[value_col], marker='o')
+    if 'anomaly_total_flags' in df.columns:
+        anom = df[df['anomaly_total_flags'] > 0]
+        ax.scatter(anom['snapshot_dt'], anom[value_col], marker='^', color='orange', s=60, zorder=3, label='Anomaly')
+        if not anom.empty:
+            ax.legend(loc='upper left')
+    ax.set_title(f"Provider {df.provider_id.iloc[0]} — {value_col}")
+    ax.set_ylabel(value_col)
+    ax.grid(True)
+
+    if has_risk:
+        axes[1].plot(df['snapshot_dt'], df[risk_col], marker='o', color='red')
+        axes[1].set_ylabel(risk_col)
+        axes[1].set_ylim(0, 1.05)
+        axes[1].grid(True)
+
+    axes[-1].set_xlabel("Month")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=100)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+# Expected facts_daily columns → dtype predicate
+FACTS_DAILY_SCHEMA = {
+    "date": ptypes.is_datetime64_any_dtype,
+    "provider_id": lambda d: ptypes.is_integer_dtype(d) or ptypes.is_string_dtype(d) or ptypes.is_object_dtype(d),
+    "state": lambda d: ptypes.is_string_dtype(d) or ptypes.is_object_dtype(d) or isinstance(d, pd.CategoricalDtype),
+    "claims_cnt": ptypes.is_numeric_dtype,
+    "avg_allowed_amt": ptypes.is_numeric_dtype,
+    "zscore_allowed_amt": ptypes.is_numeric_dtype,
+}
+
+# Columns that must never be null / negative
+REQUIRED_NON_NULL: tuple[str, ...] = ("date", "provider_id", "claims_cnt")
+NON_NEGATIVE: tuple[str, ...] = ("claims_cnt", "avg_allowed_amt")
+
+
+@dataclass
+class QCReport:
+    """
+    Compact result of a QC run: one row per failed check.
+
+    violations columns: check, column, severity ('error' / 'warning'),
+    n_violations, detail.
+    """
+
+    violations: pd.DataFrame
+    n_rows: int
+    elapsed_s: float
+
+    @property
+    def errors(self) -> pd.DataFrame:
+        return self.violations[self.violations["severity"] == "error"]
+
+    @property
+    def ok(self) -> bool:
+        return self.errors.empty
+
+    def summary(self) -> str:
+        head = f"QC over {self.n_rows:,} rows in {self.elapsed_s * 1000:.1f} ms"
+        if self.violations.empty:
+            return f"{head}: no violations"
+        lines = [
+            f"  [{r.severity}] {r.check}({r.column}): {r.n_violations:,} — {r.detail}"
+            for r in self.violations.itertuples()
+        ]
+        return "\n".join([f"{head}: {len(self.violations)} violation(s)", *lines])
+
+    def raise_for_errors(self) -> None:
+        if not self.ok:
+            raise ValueError(self.summary())
+
+
+def validate_facts_daily(
+    df: pd.DataFrame,
+    min_date: Optional[str | pd.Timestamp] = None,
+    max_date: Optional[str | pd.Timestamp] = None,
+    zscore_bound: float = 10.0,
+) -> QCReport:
+    """
+    Run vectorized data-quality checks on daily provider facts.
+
+    Every column is pulled out as a NumPy array once and each check is a
+    single vectorized pass over it:
+        - schema:     required columns present with the expected dtypes
+        - nulls:      null counts (errors for REQUIRED_NON_NULL, warnings otherwise)
+        - negative:   negative claims / allowed amounts
+        - unique_key: duplicate (provider_id, date) rows, which would
+                      otherwise silently inflate total_claims
+        - date_range: dates outside [min_date, max_date] (max defaults to today)
+        - zscore:     |zscore_allowed_amt| above `zscore_bound` or non-finite
+    """
+    start = time.perf_counter()
+    rows = []
+
+    def add(check, column, severity, n, detail):
+        if n:
+            rows.append((check, column, severity, int(n), detail))
+
+    missing = [c for c in FACTS_DAILY_SCHEMA if c not in df.columns]
+    for col in missing:
+        add("schema", col, "error", len(df) or 1, "column missing")
+
+    for col, is_ok in FACTS_DAILY_SCHEMA.items():
+        if col in df.columns and not is_ok(df[col].dtype):
+            add("schema", col, "error", len(df) or 1, f"unexpected dtype {df[col].dtype}")
+
+    # Null masks come from the native (possibly Arrow-backed) columns; only
+    # numeric / date columns are materialized as NumPy arrays
+    present = [c for c in FACTS_DAILY_SCHEMA if c in df.columns]
+    nulls = {c: df[c].isna().to_numpy() for c in present}
+    arrays = {
+        c: df[c].to_numpy()
+        for c in present
+        if ptypes.is_numeric_dtype(df[c].dtype) or ptypes.is_datetime64_any_dtype(df[c].dtype)
+    }
+
+    for col, mask in nulls.items():
+        severity = "error" if col in REQUIRED_NON_NULL else "warning"
+        add("nulls", col, severity, mask.sum(), "null values")
+
+    for col in NON_NEGATIVE:
+        if col in arrays:
+            add("negative", col, "error", np.count_nonzero(arrays[col] < 0), "negative values")
+
+    if "date" in arrays and ptypes.is_datetime64_any_dtype(df["date"].dtype):
+        days = arrays["date"].astype("datetime64[D]")
+        valid = ~nulls["date"]
+        lo = pd.Timestamp(min_date).to_datetime64() if min_date is not None else None
+        hi = pd.Timestamp(max_date if max_date is not None else pd.Timestamp.today()).to_datetime64()
+        out_of_range = valid & (days > hi)
+        if lo is not None:
+            out_of_range |= valid & (days < lo)
+        if valid.any():
+            detail = f"observed {days[valid].min()}..{days[valid].max()}"
+            add("date_range", "date", "error", np.count_nonzero(out_of_range), detail)
+
+        if "provider_id" in df.columns:
+            # Pack (provider code, day offset) into one int64 key; sorting the
+            # ints and comparing neighbours beats hashing by a wide margin
+            codes, uniques = pd.factorize(df["provider_id"])
+            keyed = valid & (codes >= 0)
+            if keyed.any():
+                day_int = days[keyed].astype("int64")
+                span = int(day_int.max() - day_int.min()) + 1
+                key = codes[keyed].astype("int64") * span + (day_int - day_int.min())
+                key_sorted = np.sort(key)
+                repeated = key_sorted[1:] == key_sorted[:-1]
+                n_dup = np.count_nonzero(repeated)
+                if n_dup:
+                    first_day = days[keyed].min()
+                    sample = ", ".join(
+                        f"({uniques[k // span]}, {first_day + (k % span)})"
+                        for k in np.unique(key_sorted[1:][repeated])[:3]
+                    )
+                    add("unique_key", "provider_id+date", "error", n_dup, f"duplicate rows, e.g. {sample}")
+
+    if "zscore_allowed_amt" in arrays:
+        z = arrays["zscore_allowed_amt"].astype("float64", copy=False)
+        bad = ~nulls["zscore_allowed_amt"] & ~(np.abs(z) <= zscore_bound)
+        add("zscore", "zscore_allowed_amt", "warning", np.count_nonzero(bad), f"|z| > {zscore_bound} or non-finite")
+
+    violations = pd.DataFrame(rows, columns=["check", "column", "severity", "n_violations", "detail"])
+    return QCReport(violations=violations, n_rows=len(df), elapsed_s=time.perf_counter() - start)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (KLL compactor hierarchy).
+
+    Level h holds items of weight 2**h. When the sketch exceeds its capacity
+    the lowest over-full level is sorted and every other item (random offset)
+    is promoted to the next level, so memory stays around 3 * k items no
+    matter how many values are added. When values are streamed in many small
+    batches the normalized rank error is about 2.6 / k with high probability
+    (k=200 ≈ ±1.3 percentile points); raise `k` to tighten it.
+
+    Sketches built on different shards or snapshots can be merged, and
+    `rank` answers percentile lookups for new values by binary search over
+    the cached, sorted items (O(log k) per value).
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: int = 0):
+        if k < 8:
+            raise ValueError(f"k must be at least 8, got {k}")
+        self.k = k
+        self.c = c
+        self.seed = seed
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._cdf: Optional[tuple[np.ndarray, np.ndarray]] = None
+
+    # --- Building ---------------------------------------------------------
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * self.c**depth)))
+
+    def _compact(self, h: int) -> None:
+        items = np.sort(self.levels[h])
+        if len(items) % 2:
+            # Odd item out stays behind at this level
+            items, keep = items[:-1], items[-1:]
+        else:
+            keep = np.empty(0)
+        promoted = items[self._rng.integers(2)::2]
+
+        if h + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[h] = keep
+        self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+
+    def _compress(self) -> None:
+        while sum(len(lvl) for lvl in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) > self._capacity(h):
+                    self._compact(h)
+                    break
+        self._cdf = None
+
+    def update(self, values) -> "KLLSketch":
+        """Add a batch of values (NaNs are ignored)."""
+        v = np.asarray(values, dtype="float64").ravel()
+        v = v[~np.isnan(v)]
+        self.levels[0] = np.concatenate([self.levels[0], v])
+        self.n += len(v)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold `other` into this sketch (e.g. combining per-state shards)."""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with different k ({self.k} vs {other.k})")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, lvl in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], lvl])
+        self.n += other.n
+        self._compress()
+        return self
+
+    # --- Queries ----------------------------------------------------------
+    def _sorted_cdf(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._cdf is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(lvl), 2.0**h) for h, lvl in enumerate(self.levels)])
+            order = np.argsort(items, kind="stable")
+            self._cdf = (items[order], np.cumsum(weights[order]))
+        return self._cdf
+
+    def rank(self, values) -> np.ndarray:
+        """
+        Approximate percentile rank of each of `values` (NaN stays NaN).
+
+        Ties are averaged the way `Series.rank(pct=True)` does, so a sketch
+        that hasn't compacted yet reproduces the exact pandas ranks.
+        """
+        items, cum = self._sorted_cdf()
+        v = np.asarray(values, dtype="float64")
+        if not len(items):
+            return np.full(v.shape, np.nan)
+        cum0 = np.concatenate([[0.0], cum])
+        below = cum0[np.searchsorted(items, v, side="left")]
+        at_or_below = cum0[np.searchsorted(items, v, side="right")]
+        out = (below + at_or_below + 1.0) / (2.0 * cum[-1])
+        return np.where(np.isnan(v), np.nan, np.minimum(out, 1.0))
+
+    def quantile(self, q) -> np.ndarray:
+        """Approximate value at each quantile in `q` (0..1)."""
+        items, cum = self._sorted_cdf()
+        target = np.asarray(q, dtype="float64") * cum[-1]
+        idx = np.searchsorted(cum, target, side="left")
+        return items[np.clip(idx, 0, len(items) - 1)]
+
+    # --- Persistence ------------------------------------------------------
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "c": self.c,
+            "seed": self.seed,
+            "n": self.n,
+            "levels": [lvl.tolist() for lvl in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KLLSketch":
+        # Reseed from (seed, n) so compaction stays reproducible after a reload
+        sketch = cls(k=data["k"], c=data["c"], seed=data["seed"])
+        sketch._rng = np.random.default_rng([data["seed"], data["n"]])
+        sketch.n = data["n"]
+        sketch.levels = [np.asarray(lvl, dtype="float64") for lvl in data["levels"]]
+        return sketch
+
+
+def build_risk_sketch(df: pd.DataFrame, col: str = "provider_risk_raw", k: int = 200, seed: int = 0) -> KLLSketch:
+    """Build a KLL sketch over the raw risk composite (see risk_scoring.compute_risk_score)."""
+    return KLLSketch(k=k, seed=seed).update(df[col].to_numpy())
+
+
+def merge_sketches(sketches: Iterable[KLLSketch]) -> KLLSketch:
+    """Merge per-shard sketches into one (inputs are left untouched)."""
+    sketches = list(sketches)
+    if not sketches:
+        raise ValueError("No sketches to merge")
+    merged = KLLSketch.from_dict(sketches[0].to_dict())
+    for s in sketches[1:]:
+        merged.merge(s)
+    return merged
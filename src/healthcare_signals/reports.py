@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import html
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from .io import DATA_PROCESSED
+from .plotting_utils import save_provider_report_chart
+
+DEFAULT_REPORT_DIR = DATA_PROCESSED / "provider_reports"
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_one(pid, df_pid, out_dir, value_col):
+    start = time.perf_counter()
+    fname = "provider_" + re.sub(r"[^A-Za-z0-9_.-]", "_", str(pid)) + ".png"
+    save_provider_report_chart(df_pid, value_col, Path(out_dir) / fname)
+    return {
+        "provider_id": pid,
+        "chart": fname,
+        "n_snapshots": len(df_pid),
+        "max_risk_score": df_pid["provider_risk_score"].max() if "provider_risk_score" in df_pid else float("nan"),
+        "max_anomaly_flags": df_pid["anomaly_total_flags"].max() if "anomaly_total_flags" in df_pid else float("nan"),
+        "render_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def _write_index(index: pd.DataFrame, out_dir: Path, value_col: str) -> Path:
+    rows = "\n".join(
+        "<tr>"
+        f"<td>{html.escape(str(r.provider_id))}</td>"
+        f"<td>{r.max_risk_score:.3f}</td>"
+        f"<td>{r.max_anomaly_flags:.0f}</td>"
+        f"<td>{r.n_snapshots}</td>"
+        f"<td>{r.render_ms:.0f}</td>"
+        f'<td><a href="{r.chart}"><img src="{r.chart}" width="360"></a></td>'
+        "</tr>"
+        for r in index.itertuples()
+    )
+    page = f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Provider audit report</title></head>
+<body>
+<h1>Provider audit report — {html.escape(value_col)}</h1>
+<p>{len(index)} providers, summed chart render time {index['render_ms'].sum() / 1000:.1f}s.</p>
+<table border="1" cellpadding="4">
+<tr><th>Provider</th><th>Max risk score</th><th>Max anomaly flags</th><th>Snapshots</th><th>Render (ms)</th><th>Chart</th></tr>
+{rows}
+</table>
+</body>
+</html>
+"""
+    path = out_dir / "index.html"
+    path.write_text(page, encoding="utf-8")
+    return path
+
+
+def render_provider_reports(
+    panel: pd.DataFrame,
+    provider_ids: Optional[Sequence] = None,
+    out_dir: str | Path = DEFAULT_REPORT_DIR,
+    value_col: str = "mean_daily_claims_90d",
+    top_n: int = 100,
+    rank_col: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Batch-render provider trend/risk charts to PNG plus an index.html.
+
+    Replaces looping `plot_provider_trend` + `plt.show()` in the notebooks:
+    the panel is grouped by provider_id once, charts are rendered with the
+    non-interactive Agg backend across a process pool, and per-chart render
+    time is recorded in the index and in `render_times.csv`.
+
+    When `provider_ids` is None, the `top_n` providers by max `rank_col` are
+    rendered; `rank_col` defaults to provider_risk_score, or to
+    anomaly_total_flags on a panel that hasn't been risk-scored yet (notebook
+    03). With max_workers=1 charts are rendered in the calling process.
+    Returns the index table (one row per provider, in input order).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if rank_col is None:
+        rank_col = "provider_risk_score" if "provider_risk_score" in panel.columns else "anomaly_total_flags"
+
+    if provider_ids is None:
+        provider_ids = (
+            panel.groupby("provider_id")[rank_col].max()
+            .sort_values(ascending=False)
+            .head(top_n)
+            .index.tolist()
+        )
+
+    subset = panel[panel["provider_id"].isin(provider_ids)].rename(columns={"as_of_date": "snapshot_dt"})
+    groups = {
+        pid: g.sort_values("snapshot_dt")
+        for pid, g in subset.groupby("provider_id", sort=False)
+    }
+
+    tasks = [(pid, groups[pid], out_dir, value_col) for pid in provider_ids if pid in groups]
+    if max_workers == 1:
+        rows = [_render_one(*args) for args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render_one, *args) for args in tasks]
+            rows = [f.result() for f in futures]
+    index = pd.DataFrame(rows)
+
+    if index.empty:
+        return index
+
+    index.to_csv(out_dir / "render_times.csv", index=False)
+    _write_index(index, out_dir, value_col)
+    return index
@@ -5,11 +5,19 @@ def normalize(series):
     """Min-max normalize a pandas Series."""
     return (series - series.min()) / (series.max() - series.min() + 1e-9)
 
-def percentile_rank(series):
-    """Convert raw values to percentile ranks."""
+def percentile_rank(series, sketch=None):
+    """
+    Convert raw values to percentile ranks.
+
+    With a quantile sketch (see quantile_sketch.KLLSketch), ranks are looked
+    up against the sketch instead of re-ranking the whole series. Both paths
+    average ties.
+    """
+    if sketch is not None:
+        return pd.Series(sketch.rank(series.to_numpy()), index=series.index)
     return series.rank(pct=True)
 
-def compute_risk_score(df):
+def compute_risk_score(df, drift_weight=0.0, sketch=None, update_sketch=False):
     """
     Compute a unified provider risk score using weighted anomaly inputs.
     Requires columns:
@@ -19,6 +27,18 @@ def compute_risk_score(df):
         - claims_90d_vs_prev90d
         - zscore_90d_vs_prev90d
         - days_since_last
+
+    With drift_weight > 0, also requires `drift_score` (see drift.py); the
+    drift component gets that weight and the others are scaled to make room.
+
+    With a `sketch` built over `provider_risk_raw` (possibly merged across
+    shards), `provider_risk_score` is its approximate percentile in the
+    sketch rather than a fresh rank over `df`.
+
+    With update_sketch=True, `provider_risk_raw` is first folded into
+    `sketch` (a new KLLSketch when None), the scores are ranked against the
+    updated sketch, and (df, sketch) is returned so the caller can persist
+    or merge it.
     """
 
     # Normalize signals (higher = riskier)
@@ -28,6 +48,8 @@ def compute_risk_score(df):
     df['momentum_norm'] = normalize(df['claims_90d_vs_prev90d'])
     df['zscore_shift_norm'] = normalize(df['zscore_90d_vs_prev90d'])
     df['recency_norm'] = normalize(df['days_since_last'])
+    if drift_weight > 0:
+        df['drift_norm'] = normalize(df['drift_score'].fillna(0.0))
 
     # Composite weights (tunable)
     weights = {
@@ -38,12 +60,24 @@ def compute_risk_score(df):
         'zscore_shift_norm': 0.10,
         'recency_norm': 0.05,
     }
+    if drift_weight > 0:
+        weights = {col: w * (1 - drift_weight) for col, w in weights.items()}
+        weights['drift_norm'] = drift_weight
 
     df['provider_risk_raw'] = sum(
         df[col] * w for col, w in weights.items()
     )
 
+    if update_sketch:
+        if sketch is None:
+            # Imported here: notebooks load this module standalone, outside the package
+            from .quantile_sketch import KLLSketch
+            sketch = KLLSketch()
+        sketch.update(df['provider_risk_raw'].to_numpy())
+
     # Percentile rank for interpretability
-    df['provider_risk_score'] = percentile_rank(df['provider_risk_raw'])
+    df['provider_risk_score'] = percentile_rank(df['provider_risk_raw'], sketch=sketch)
 
+    if update_sketch:
+        return df, sketch
     return df
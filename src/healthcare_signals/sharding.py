@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Mapping, Optional, Sequence
+
+import pandas as pd
+
+from .features_provider import DEFAULT_WINDOWS, assign_provider_states, build_provider_panel_over_range
+from .io import load_facts_daily
+from .model_anomaly import run_anomaly_ensemble
+from .quantile_sketch import KLLSketch, build_risk_sketch, merge_sketches
+from .risk_scoring import compute_risk_score
+
+_PANEL_ORDER = ["state", "as_of_date", "provider_id"]
+_PANEL_KEY = ["provider_id", "as_of_date"]
+
+
+def _check_unique_keys(panel: pd.DataFrame) -> pd.DataFrame:
+    n_dup = int(panel.duplicated(_PANEL_KEY).sum())
+    if n_dup:
+        raise ValueError(
+            f"Stitched panel has {n_dup} duplicate (provider_id, as_of_date) rows; "
+            "a provider appears in more than one state shard."
+        )
+    return panel
+
+
+def _build_shard(state, facts_state, snapshot_dates, windows):
+    return state, build_provider_panel_over_range(snapshot_dates, facts_daily=facts_state, windows=windows)
+
+
+def build_state_shards(
+    snapshot_dates: Sequence[str | pd.Timestamp],
+    facts_daily: Optional[pd.DataFrame] = None,
+    states: Optional[Sequence[str]] = None,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    max_workers: Optional[int] = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Build the provider panel independently for each state.
+
+    Every provider is assigned a single state (`assign_provider_states`:
+    the state with most of its claims) and *all* of its facts are routed to
+    that shard, so a provider billing in several states is built once, with
+    its full history. Each shard is built in a separate process. Pass
+    `states` to (re)build a subset without touching the others.
+    Returns {state: panel}; states with no history are omitted.
+    """
+    if facts_daily is None:
+        facts_daily = load_facts_daily()
+
+    shard_key = facts_daily["provider_id"].map(assign_provider_states(facts_daily))
+
+    if states is None:
+        states = sorted(shard_key.dropna().unique())
+
+    wanted = set(states)
+    groups = {s: g for s, g in facts_daily.groupby(shard_key, sort=False) if s in wanted}
+
+    shards = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_build_shard, s, groups[s], snapshot_dates, windows)
+            for s in states
+            if s in groups
+        ]
+        for f in futures:
+            state, panel = f.result()
+            if not panel.empty:
+                shards[state] = panel
+    return shards
+
+
+def score_state_shard(
+    shard: pd.DataFrame,
+    feature_cols: Sequence[str],
+    zscore_cols: Sequence[str] = (),
+    contamination: float = 0.02,
+    n_neighbors: int = 20,
+    random_state: int = 42,
+    drift_weight: float = 0.0,
+    with_sketch: bool = False,
+) -> pd.DataFrame | tuple[pd.DataFrame, KLLSketch]:
+    """
+    Run the anomaly ensemble and risk scoring on a single state shard.
+
+    Detectors, z-scores, min-max normalizations and the percentile risk
+    score are all computed against the shard alone, i.e. against state peers
+    rather than the national cross-section. With with_sketch=True, a KLL
+    sketch over the shard's `provider_risk_raw` is built alongside and
+    (shard, sketch) is returned.
+    """
+    if shard.empty:
+        raise ValueError("Cannot score an empty shard")
+
+    # Fill missing window features with 0 the way the panel build does,
+    # rather than dropping providers from the scored panel
+    shard = shard.copy()
+    for col in feature_cols:
+        if col not in shard.columns:
+            shard[col] = 0.0
+    n_missing = int(shard[list(feature_cols)].isna().any(axis=1).sum())
+    if n_missing:
+        warnings.warn(f"Filled NaN features with 0 for {n_missing} shard rows", stacklevel=2)
+        shard[list(feature_cols)] = shard[list(feature_cols)].fillna(0)
+
+    # Shards already run one per process; don't oversubscribe inside them
+    shard = run_anomaly_ensemble(
+        shard,
+        feature_cols,
+        zscore_cols,
+        contamination=contamination,
+        n_neighbors=min(n_neighbors, max(len(shard) - 1, 1)),
+        random_state=random_state,
+        n_jobs=1,
+    )
+    shard = compute_risk_score(shard, drift_weight=drift_weight)
+    shard['risk_rank'] = shard['provider_risk_score'].rank(method='dense', ascending=False)
+    if with_sketch:
+        return shard, build_risk_sketch(shard)
+    return shard
+
+
+def score_state_shards(
+    shards: Mapping[str, pd.DataFrame],
+    feature_cols: Sequence[str],
+    zscore_cols: Sequence[str] = (),
+    max_workers: Optional[int] = None,
+    with_sketch: bool = False,
+    **kwargs,
+) -> dict[str, pd.DataFrame] | tuple[dict[str, pd.DataFrame], KLLSketch]:
+    """
+    Score every shard with `score_state_shard` in parallel, one process per shard.
+
+    Empty shards are skipped (with a warning naming them) instead of failing
+    inside a worker. With with_sketch=True, the per-shard risk sketches are
+    merged and ({state: shard}, sketch) is returned; persist the sketch with
+    io.save_risk_sketch and pass it to compute_risk_score to rank against
+    the national distribution.
+    """
+    empty = sorted(state for state, shard in shards.items() if shard.empty)
+    if empty:
+        warnings.warn(f"Skipping {len(empty)} empty state shard(s): {', '.join(map(str, empty))}", stacklevel=2)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            state: pool.submit(
+                score_state_shard, shard, feature_cols, zscore_cols, with_sketch=with_sketch, **kwargs
+            )
+            for state, shard in shards.items()
+            if not shard.empty
+        }
+        results = {state: f.result() for state, f in futures.items()}
+
+    if not with_sketch:
+        return results
+    scored = {state: shard for state, (shard, _) in results.items()}
+    return scored, merge_sketches(sketch for _, sketch in results.values())
+
+
+def stitch_shards(shards: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate state shards back into one panel, ordered by state then as_of_date.
+
+    Raises ValueError if any (provider_id, as_of_date) appears more than once.
+    """
+    if not shards:
+        return pd.DataFrame()
+    panel = pd.concat([shards[s] for s in sorted(shards)], ignore_index=True)
+    return _check_unique_keys(panel.sort_values(_PANEL_ORDER, kind="stable", ignore_index=True))
+
+
+def refresh_state_shard(panel: pd.DataFrame, state: str, shard: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace one state's rows in a stitched panel with a freshly built/scored shard.
+
+    Raises ValueError if the result has duplicate (provider_id, as_of_date) rows.
+    """
+    merged = pd.concat([panel[panel["state"] != state], shard], ignore_index=True)
+    return _check_unique_keys(merged.sort_values(_PANEL_ORDER, kind="stable", ignore_index=True))
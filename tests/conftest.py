@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = str(Path(__file__).resolve().parents[1] / "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
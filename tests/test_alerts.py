@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from healthcare_signals import io
+from healthcare_signals.alerts import build_risk_alerts, run_risk_alert_stage
+
+
+def _snapshot(as_of, scores, flags):
+    return pd.DataFrame(
+        {
+            "provider_id": ["a", "b", "c"][: len(scores)],
+            "as_of_date": pd.Timestamp(as_of),
+            "provider_risk_score": scores,
+            "anomaly_total_flags": flags,
+        }
+    )
+
+
+@pytest.fixture
+def processed(tmp_path, monkeypatch):
+    monkeypatch.setattr(io, "DATA_PROCESSED", tmp_path)
+    return tmp_path
+
+
+def test_alerts_on_threshold_and_new_flags():
+    prev = _snapshot("2010-01-31", [0.5, 0.96, 0.2], [0, 1, 0])
+    cur = _snapshot("2010-02-28", [0.92, 0.97, 0.2], [0, 1, 2])
+
+    alerts = build_risk_alerts(cur, prev, min_rank_rise=10)
+
+    assert alerts.set_index("provider_id")["reasons"].to_dict() == {
+        "a": "crossed 0.90",
+        "c": "flags +2",
+    }
+
+
+def test_stage_diffs_against_previous_saved_snapshot(processed):
+    first = run_risk_alert_stage(_snapshot("2010-01-31", [0.5, 0.96, 0.2], [0, 1, 0]))
+    assert first["reasons"].str.contains("new provider").all()
+
+    cur = _snapshot("2010-02-28", [0.92, 0.97, 0.2], [0, 1, 0])
+    alerts = run_risk_alert_stage(cur, min_rank_rise=10)
+    assert alerts["provider_id"].tolist() == ["a"]
+    assert alerts["prev_as_of_date"].iloc[0] == pd.Timestamp("2010-01-31")
+    assert (processed / "risk_alerts_asof=2010-02-28.parquet").exists()
+
+    # Re-running a date still diffs against the date before it
+    rerun = run_risk_alert_stage(cur, min_rank_rise=10)
+    pd.testing.assert_frame_equal(rerun, alerts)
+
+
+def test_stage_rejects_multiple_dates(processed):
+    panel = pd.concat(
+        [_snapshot("2010-01-31", [0.1], [0]), _snapshot("2010-02-28", [0.2], [0])]
+    )
+    with pytest.raises(ValueError, match="single as_of_date"):
+        run_risk_alert_stage(panel)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthcare_signals import io
+from healthcare_signals.drift import drift_score_columns, run_drift_over_panel, update_drift_state
+
+
+def _panel(shift_provider=None, shift_from=None, n_providers=20, n_snapshots=12, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, d in enumerate(pd.date_range("2010-01-31", periods=n_snapshots, freq="ME")):
+        for p in range(n_providers):
+            level = 10.0 + (8.0 if p == shift_provider and i >= shift_from else 0.0)
+            rows.append(
+                {
+                    "provider_id": str(p),
+                    "as_of_date": d,
+                    "mean_daily_claims_30d": level + rng.normal(0, 0.5),
+                    "mean_zscore_allowed_30d": rng.normal(0, 0.5),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def test_cusum_flags_level_shift():
+    out, _ = run_drift_over_panel(_panel(shift_provider=3, shift_from=8))
+    shifted = out[(out["provider_id"] == "3") & (out["as_of_date"] >= "2010-09-01")]
+    assert shifted["drift_change_flag"].any()
+    assert out.loc[out["provider_id"] == "3", "drift_score"].max() == out["drift_score"].max()
+
+
+def test_drift_output_keeps_one_row_per_key():
+    panel = _panel()
+    out, _ = run_drift_over_panel(panel)
+    assert len(out) == len(panel)
+
+
+def test_state_refuses_out_of_order_snapshots():
+    panel = _panel()
+    dates = sorted(panel["as_of_date"].unique())
+    state, _ = update_drift_state(None, panel[panel["as_of_date"] == dates[1]])
+    with pytest.raises(ValueError):
+        update_drift_state(state, panel[panel["as_of_date"] == dates[0]])
+
+
+def test_resume_from_saved_state_matches_full_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(io, "DATA_PROCESSED", tmp_path)
+    panel = _panel(shift_provider=3, shift_from=8)
+    full_out, full_state = run_drift_over_panel(panel)
+
+    half_out, half_state = run_drift_over_panel(panel[panel["as_of_date"] <= "2010-06-30"])
+    io.save_drift_state(half_state)
+    io.save_drift_scores(half_out)
+    out, resumed = run_drift_over_panel(panel, state=io.load_drift_state(), scores=io.load_drift_scores())
+
+    pd.testing.assert_frame_equal(resumed.sort_index(), full_state.sort_index(), check_dtype=False)
+    key = ["provider_id", "as_of_date"]
+    cols = key + drift_score_columns()
+    pd.testing.assert_frame_equal(
+        out[cols].sort_values(key, ignore_index=True),
+        full_out[cols].sort_values(key, ignore_index=True),
+        check_dtype=False,
+    )
+
+
+def test_resume_with_no_new_snapshot_keeps_drift_columns():
+    panel = _panel()
+    full_out, state = run_drift_over_panel(panel)
+    out, _ = run_drift_over_panel(panel, state=state, scores=full_out)
+    assert out["drift_score"].notna().all()
+    pd.testing.assert_series_equal(out["drift_score"], full_out["drift_score"])
+
+
+def test_resume_without_saved_scores_is_refused():
+    panel = _panel()
+    _, state = run_drift_over_panel(panel)
+    with pytest.raises(ValueError, match="saved"):
+        run_drift_over_panel(panel, state=state)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthcare_signals.model_anomaly import (
+    FeatureMatrix,
+    add_zscore_flags,
+    combine_flags,
+    run_anomaly_ensemble,
+    run_isolation_forest,
+    run_lof,
+    score_anomalies,
+)
+
+FEATURES = ["a", "b", "c", "d"]
+
+
+@pytest.fixture(scope="module")
+def features_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(size=(600, 5)), columns=["a", "b", "c", "d", "e"])
+
+
+def _reference_flags(df, feature_cols, zscore_cols, contamination=0.02, n_neighbors=20):
+    """The original (pre-FeatureMatrix) detector helpers, on float64 df slices."""
+    from sklearn.ensemble import IsolationForest
+    from sklearn.neighbors import LocalOutlierFactor
+
+    df = df.copy()
+    model = IsolationForest(contamination=contamination, n_estimators=400, max_samples='auto', random_state=42)
+    df['iforest_flag'] = (model.fit_predict(df[feature_cols]) == -1).astype(int)
+    lof = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination)
+    df['lof_flag'] = (lof.fit_predict(df[feature_cols]) == -1).astype(int)
+    for col in zscore_cols:
+        z = (df[col] - df[col].mean()) / df[col].std(ddof=0)
+        df[f'{col}_z_flag'] = (z.abs() > 3.0).astype(int)
+    flag_cols = [c for c in df.columns if c.endswith("_flag")]
+    df['anomaly_total_flags'] = df[flag_cols].sum(axis=1)
+    df['anomaly_rank'] = df['anomaly_total_flags'].rank(method='dense', ascending=False)
+    return df
+
+
+def test_helpers_match_reference_flags(features_df):
+    df = features_df.copy()
+    df.loc[::7, "e"] = np.nan  # z-score column outside the matrix, with NaNs
+    df.loc[::50, "e"] = 40.0
+    ref = _reference_flags(df, FEATURES, ["a", "e"])
+
+    fm = FeatureMatrix.from_frame(df, FEATURES)
+    out = df.copy()
+    run_isolation_forest(out, FEATURES, features=fm)
+    run_lof(out, FEATURES, features=fm)
+    add_zscore_flags(out, ["a", "e"], features=fm)
+    combine_flags(out)
+
+    assert ref["e_z_flag"].sum() > 0
+    for col in ["iforest_flag", "lof_flag", "a_z_flag", "e_z_flag", "anomaly_total_flags", "anomaly_rank"]:
+        np.testing.assert_array_equal(out[col].to_numpy(), ref[col].to_numpy(), err_msg=col)
+
+    ens = score_anomalies(df.copy(), FEATURES, zscore_cols=["a", "e"])
+    np.testing.assert_array_equal(ens["anomaly_total_flags"].to_numpy(), ref["anomaly_total_flags"].to_numpy())
+
+
+def test_helpers_write_in_place(features_df):
+    df = features_df.copy()
+    assert run_lof(df, FEATURES) is df
+    assert "lof_flag" in df.columns
+
+
+def test_feature_matrix_must_match_feature_cols(features_df):
+    fm = FeatureMatrix.from_frame(features_df, ["a", "b"])
+    with pytest.raises(ValueError):
+        run_isolation_forest(features_df.copy(), FEATURES, features=fm)
+
+
+def test_ensemble_matches_sequential(features_df):
+    seq = score_anomalies(features_df.copy(), FEATURES, zscore_cols=["a", "e"])
+    par = run_anomaly_ensemble(features_df.copy(), FEATURES, zscore_cols=["a", "e"], n_jobs=2)
+    pd.testing.assert_frame_equal(seq, par)
+
+
+def test_lof_from_knn_matches_sklearn(features_df):
+    from sklearn.neighbors import LocalOutlierFactor, NearestNeighbors
+
+    from healthcare_signals.model_anomaly import lof_from_knn
+
+    X = features_df[FEATURES].to_numpy(dtype=np.float32)
+    distances, indices = NearestNeighbors(n_neighbors=40).fit(X).kneighbors()
+    for k in (5, 20, 40):
+        expected = LocalOutlierFactor(n_neighbors=k).fit(X).negative_outlier_factor_
+        np.testing.assert_allclose(lof_from_knn(distances, indices, k), expected, atol=1e-5)
+
+
+def test_sweep_flags_match_refits(features_df):
+    from healthcare_signals.model_anomaly import sweep_anomaly_params
+
+    sweep = sweep_anomaly_params(
+        features_df, FEATURES, n_neighbors_grid=(10, 20), contamination_grid=(0.02, 0.05)
+    )
+    assert len(sweep.report) == 2 + 2 * 2
+
+    ref = sweep.report[(sweep.report["detector"] == "lof") & (sweep.report["n_neighbors"] == 20)]
+    np.testing.assert_allclose(ref["rank_corr"], 1.0)
+
+    for c in (0.02, 0.05):
+        iforest = run_isolation_forest(features_df.copy(), FEATURES, contamination=c)
+        np.testing.assert_array_equal(sweep.flags("iforest", c).to_numpy(), iforest["iforest_flag"].to_numpy())
+
+        lof = run_lof(features_df.copy(), FEATURES, n_neighbors=10, contamination=c)
+        np.testing.assert_array_equal(sweep.flags("lof", c, n_neighbors=10).to_numpy(), lof["lof_flag"].to_numpy())
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthcare_signals import io
+from healthcare_signals.qc import validate_facts_daily
+
+
+def _facts(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "date": pd.Timestamp("2010-01-01") + pd.to_timedelta(np.arange(n) % 100, "D"),
+            "provider_id": np.arange(n) // 100,
+            "state": "CA",
+            "claims_cnt": rng.poisson(3, n),
+            "avg_allowed_amt": rng.gamma(2, 3, n),
+            "zscore_allowed_amt": rng.normal(size=n),
+        }
+    )
+
+
+def test_clean_facts_pass():
+    report = validate_facts_daily(_facts())
+    assert report.ok
+    assert report.violations.empty
+
+
+def test_duplicates_and_negatives_are_errors():
+    facts = _facts()
+    facts = pd.concat([facts, facts.head(3)], ignore_index=True)
+    facts.loc[5, "claims_cnt"] = -1
+    facts.loc[7, "zscore_allowed_amt"] = np.inf
+
+    report = validate_facts_daily(facts)
+    found = report.violations.set_index("check")
+    assert found.loc["unique_key", "n_violations"] == 3
+    assert found.loc["negative", "n_violations"] == 1
+    assert found.loc["zscore", "severity"] == "warning"
+    with pytest.raises(ValueError):
+        report.raise_for_errors()
+
+
+def test_load_facts_daily_validates_by_default(tmp_path, monkeypatch):
+    facts = _facts()
+    pd.concat([facts, facts.head(1)]).to_parquet(tmp_path / "facts_daily.parquet")
+    monkeypatch.setattr(io, "DATA_RAW", tmp_path)
+
+    with pytest.raises(ValueError):
+        io.load_facts_daily()
+    assert len(io.load_facts_daily(validate=False)) == len(facts) + 1
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthcare_signals.quantile_sketch import KLLSketch, merge_sketches
+from healthcare_signals.risk_scoring import compute_risk_score, percentile_rank
+
+K = 200
+# Normalized rank error of KLL at k=200 (~2.6 / k) for streamed input
+ERROR_BOUND = 0.013
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(1).normal(size=200_000)
+
+
+@pytest.fixture(scope="module")
+def exact_ranks(values):
+    return pd.Series(values).rank(pct=True).to_numpy()
+
+
+@pytest.fixture(scope="module")
+def probe(values):
+    return np.random.default_rng(2).integers(0, len(values), 5_000)
+
+
+def test_rank_error_within_bound(values, exact_ranks, probe):
+    sketch = KLLSketch(k=K).update(values)
+    err = np.abs(sketch.rank(values[probe]) - exact_ranks[probe]).max()
+    assert err <= ERROR_BOUND
+    assert sum(len(lvl) for lvl in sketch.levels) < 4 * K
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_streamed_rank_error_within_bound(values, exact_ranks, probe, seed):
+    sketch = KLLSketch(k=K, seed=seed)
+    for batch in np.array_split(values, 2000):
+        sketch.update(batch)
+    err = np.abs(sketch.rank(values[probe]) - exact_ranks[probe]).max()
+    assert err <= ERROR_BOUND
+
+
+def test_merged_shards_within_bound(values, exact_ranks, probe):
+    shards = [KLLSketch(k=K, seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 50))]
+    merged = merge_sketches(shards)
+    assert merged.n == len(values)
+    err = np.abs(merged.rank(values[probe]) - exact_ranks[probe]).max()
+    assert err <= ERROR_BOUND
+
+
+def test_round_trip_preserves_ranks(values, probe):
+    sketch = KLLSketch(k=K).update(values)
+    restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    np.testing.assert_array_equal(restored.rank(values[probe]), sketch.rank(values[probe]))
+
+
+def test_merge_rejects_mismatched_k():
+    with pytest.raises(ValueError):
+        KLLSketch(k=100).merge(KLLSketch(k=200))
+
+
+def test_exact_sketch_matches_pandas_ranks_with_ties():
+    series = pd.Series([3.0, 1.0, 2.0, 2.0, 5.0, 2.0, np.nan])
+    sketch = KLLSketch(k=K).update(series.to_numpy())
+    pd.testing.assert_series_equal(percentile_rank(series, sketch), percentile_rank(series))
+
+
+def test_compute_risk_score_builds_sketch_in_one_call():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(
+        {
+            col: rng.normal(size=300)
+            for col in (
+                "iforest_score",
+                "lof_score",
+                "anomaly_total_flags",
+                "claims_90d_vs_prev90d",
+                "zscore_90d_vs_prev90d",
+                "days_since_last",
+            )
+        }
+    )
+    scored, sketch = compute_risk_score(df.copy(), update_sketch=True)
+    assert sketch.n == len(df)
+    np.testing.assert_allclose(
+        scored["provider_risk_score"], compute_risk_score(df.copy())["provider_risk_score"], atol=ERROR_BOUND
+    )
+
+    # Updating an existing sketch folds the new batch in
+    _, sketch = compute_risk_score(df.copy(), sketch=sketch, update_sketch=True)
+    assert sketch.n == 2 * len(df)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from healthcare_signals.reports import render_provider_reports
+
+
+def _panel(with_risk=True):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2010-01-31", periods=4, freq="ME")
+    panel = pd.DataFrame(
+        {
+            "provider_id": np.repeat(["p1", "p/2", "p3"], len(dates)),
+            "as_of_date": np.tile(dates, 3),
+            "mean_daily_claims_90d": rng.gamma(2, 5, 12),
+            "anomaly_total_flags": [0, 1, 0, 2, 0, 0, 0, 0, 1, 0, 0, 0],
+        }
+    )
+    if with_risk:
+        panel["provider_risk_score"] = np.repeat([0.5, 0.9, 0.2], len(dates))
+    return panel
+
+
+def test_renders_charts_and_index(tmp_path):
+    index = render_provider_reports(_panel(), out_dir=tmp_path, max_workers=1)
+
+    assert index["provider_id"].tolist() == ["p/2", "p1", "p3"]
+    assert index["n_snapshots"].tolist() == [4, 4, 4]
+    assert index["chart"].tolist() == ["provider_p_2.png", "provider_p1.png", "provider_p3.png"]
+    for chart in index["chart"]:
+        assert (tmp_path / chart).read_bytes().startswith(b"\x89PNG")
+
+    page = (tmp_path / "index.html").read_text(encoding="utf-8")
+    assert all(f'src="{chart}"' in page for chart in index["chart"])
+    times = pd.read_csv(tmp_path / "render_times.csv")
+    assert times["provider_id"].tolist() == index["provider_id"].tolist()
+    assert (times["render_ms"] > 0).all()
+
+
+def test_unscored_panel_ranks_by_anomaly_flags(tmp_path):
+    index = render_provider_reports(_panel(with_risk=False), out_dir=tmp_path, top_n=2, max_workers=1)
+    assert index["provider_id"].tolist() == ["p1", "p3"]
+    assert index["max_anomaly_flags"].tolist() == [2, 1]
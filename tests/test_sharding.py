@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from healthcare_signals.features_provider import assign_provider_states, build_provider_panel_over_range
+from healthcare_signals.sharding import build_state_shards, refresh_state_shard, score_state_shards, stitch_shards
+
+SNAPSHOTS = pd.date_range("2010-06-30", "2010-09-30", freq="ME")
+
+
+@pytest.fixture(scope="module")
+def facts():
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2010-01-01", "2010-09-30")
+    frames = []
+    for p in range(12):
+        d = rng.choice(days, 40, replace=False)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "date": d,
+                    "provider_id": p,
+                    "state": ["CA", "NY", "TX"][p % 3],
+                    "claims_cnt": rng.poisson(5, 40),
+                    "avg_allowed_amt": rng.gamma(2, 50, 40),
+                    "zscore_allowed_amt": rng.normal(size=40),
+                }
+            )
+        )
+    # Provider 0 (mostly CA) also bills a few days in NY
+    frames.append(
+        pd.DataFrame(
+            {
+                "date": pd.to_datetime(["2010-02-03", "2010-03-03", "2010-04-03"]),
+                "provider_id": 0,
+                "state": "NY",
+                "claims_cnt": 6,
+                "avg_allowed_amt": 10.0,
+                "zscore_allowed_amt": 0.1,
+            }
+        )
+    )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_provider_assigned_to_dominant_state(facts):
+    assert assign_provider_states(facts).loc[0] == "CA"
+
+
+def test_multi_state_provider_built_once(facts):
+    panel = stitch_shards(build_state_shards(SNAPSHOTS, facts, max_workers=1))
+    national = build_provider_panel_over_range(SNAPSHOTS, facts)
+
+    assert not panel.duplicated(["provider_id", "as_of_date"]).any()
+    assert len(panel) == len(national)
+
+    ours = panel[panel["provider_id"] == 0].set_index("as_of_date")["total_claims_lifetime"]
+    theirs = national[national["provider_id"] == 0].set_index("as_of_date")["total_claims_lifetime"]
+    pd.testing.assert_series_equal(ours, theirs)
+
+
+def test_refresh_rejects_duplicate_keys(facts):
+    panel = stitch_shards(build_state_shards(SNAPSHOTS, facts, max_workers=1))
+    with pytest.raises(ValueError):
+        refresh_state_shard(panel, "NY", panel[panel["state"] == "CA"].assign(state="NY"))
+
+
+def test_scored_shards_merge_risk_sketches(facts):
+    shards = build_state_shards(SNAPSHOTS, facts, max_workers=1)
+    scored, sketch = score_state_shards(
+        shards, ["total_claims_lifetime", "mean_daily_claims_90d"], max_workers=1, with_sketch=True
+    )
+
+    assert set(scored) == set(shards)
+    assert sketch.n == sum(len(s) for s in scored.values())
+    raw = pd.concat(scored.values())["provider_risk_raw"]
+    np.testing.assert_allclose(sketch.rank(raw.to_numpy()), raw.rank(pct=True).to_numpy())